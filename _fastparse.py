@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+_fastparse.py — shared fast parser for Health-ingest data blobs
+───────────────────────────────────────────────────────────────
+The "data" column of bio_*.csv holds dict blobs that are usually valid
+JSON, but blobs that went through pandas' str() round-trip are
+Python-repr instead: single quotes, None/True/False, sometimes smart
+quotes. Walking those through ast.literal_eval is by far the hottest
+call in the pipeline, so `loads_blob` normalizes the repr dialect to
+JSON with one compiled-regex pass (the safe_load trick from
+old_fusion_code/fusionv2.py) and parses with orjson. literal_eval stays
+as the fallback for the rare blob the normalization mangles, e.g. an
+apostrophe inside a source-device name.
+"""
+
+import ast
+import re
+
+import orjson
+
+_SUB = re.compile(rb"'|None|True|False")
+_MAP = {b"'": b'"', b"None": b"null", b"True": b"true", b"False": b"false"}
+
+
+def loads_blob(raw: str) -> dict:
+    """Parse one data blob into a dict (raises on hopeless input)."""
+    if raw.startswith('{"'):
+        try:
+            return orjson.loads(raw)            # already valid JSON
+        except orjson.JSONDecodeError:
+            pass
+
+    buf = raw.encode()
+    # smart → straight apostrophes, then repr tokens → JSON in one pass
+    buf = buf.replace(b"\xe2\x80\x99", b"'").replace(b"\xe2\x80\x98", b"'")
+    try:
+        return orjson.loads(_SUB.sub(lambda m: _MAP[m.group(0)], buf))
+    except orjson.JSONDecodeError:
+        return ast.literal_eval(raw)
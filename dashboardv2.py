@@ -31,6 +31,7 @@ HOW
 """
 
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import streamlit as st
 
@@ -38,9 +39,71 @@ import streamlit as st
 FUSED_DIR = Path("~/biologger/data/fused").expanduser()
 AUTO_REFRESH_SEC = 60
 
+try:
+    from numba import njit
+except ImportError:        # numba is optional; the loop is fine for one day
+    njit = None
+
+
+def _day_stats_kernel(hod, co2, hr):
+    """One fused pass over the day's arrays.
+
+    Returns (night CO₂ mean, night HR mean, day CO₂ mean,
+    CO₂ mean while HR < 65 bpm, Pearson r) — everything the score and
+    correlation sections need, without separate pandas scans per metric.
+    """
+    s_co2_n = s_hr_n = s_co2_d = s_low = 0.0
+    c_co2_n = c_hr_n = c_co2_d = c_low = 0
+    n = 0
+    sx = sy = sxx = syy = sxy = 0.0
+    for i in range(co2.size):
+        c = co2[i]
+        h = hr[i]
+        c_ok = c == c                      # not-NaN without np.isnan calls
+        h_ok = h == h
+        if hod[i] < 8:
+            if c_ok:
+                s_co2_n += c; c_co2_n += 1
+            if h_ok:
+                s_hr_n += h; c_hr_n += 1
+        elif c_ok:
+            s_co2_d += c; c_co2_d += 1
+        if h_ok and h < 65.0 and c_ok:
+            s_low += c; c_low += 1
+        if c_ok and h_ok:
+            n += 1
+            sx += c; sy += h
+            sxx += c * c; syy += h * h; sxy += c * h
+
+    nan = float("nan")
+    co2_night = s_co2_n / c_co2_n if c_co2_n else nan
+    hr_night  = s_hr_n / c_hr_n if c_hr_n else nan
+    co2_day   = s_co2_d / c_co2_d if c_co2_d else nan
+    co2_low   = s_low / c_low if c_low else nan
+    r = nan
+    if n > 1:
+        var = (sxx - sx * sx / n) * (syy - sy * sy / n)
+        if var > 0:
+            r = (sxy - sx * sy / n) / var ** 0.5
+    return co2_night, hr_night, co2_day, co2_low, r
+
+
+# no fastmath: the kernel leans on NaN self-comparison for validity
+if njit is not None:
+    _day_stats_kernel = njit(cache=True)(_day_stats_kernel)
+
 # ── SIDEBAR – file + bucket selection ────────────────────────────────
 st.sidebar.title("Data source")
-all_fused = sorted(FUSED_DIR.glob("fused_*.csv"))
+
+
+# keyed on the directory mtime: one stat syscall per rerun replaces the
+# full glob until a fused file is actually added or removed
+@st.cache_data(show_spinner=False)
+def list_fused(dir_mtime_ns: int):
+    return sorted(FUSED_DIR.glob("fused_*.csv"))
+
+
+all_fused = list_fused(FUSED_DIR.stat().st_mtime_ns) if FUSED_DIR.exists() else []
 if not all_fused:
     st.error(f"No fused CSV files found in {FUSED_DIR}")
     st.stop()
@@ -62,32 +125,68 @@ bucket = st.sidebar.selectbox(
 freq = bucket[1]
 
 # ── LOAD & RESAMPLE ──────────────────────────────────────────────────
-df = pd.read_csv(file_choice, parse_dates=["timestamp"])
-df = df.set_index("timestamp").sort_index()
-
-if freq != "1min":
-    df = (df
-          .resample(freq)
-          .agg({
-              "co2_ppm": "mean",
-              "temp_c": "mean",
-              "humidity_pct": "mean",
-              "hr_bpm": "mean",
-              "source": "first",
-              "context": "first",
-          })
-          .dropna(subset=["co2_ppm"]))
+# Cached on (path, mtime) — not a wall-clock TTL — so every widget click
+# reuses the parsed frame and only a real file change triggers a re-read
+@st.cache_data(show_spinner=False)
+def load_fused(path: str, mtime_ns: int) -> pd.DataFrame:
+    p = Path(path)
+    pq = p.with_suffix(".parquet")
+    if pq.exists():
+        # Parquet first: columnar projection loads only the columns we chart
+        df = pd.read_parquet(pq, columns=["timestamp", "co2_ppm", "hr_bpm"])
+    else:
+        df = pd.read_csv(p, parse_dates=["timestamp"], engine="pyarrow",
+                         usecols=["timestamp", "co2_ppm", "hr_bpm"],
+                         dtype={"co2_ppm": "float32", "hr_bpm": "float32"})
+    return df.set_index("timestamp").sort_index()
+
+
+@st.cache_data(show_spinner=False)
+def resample_fused(path: str, mtime_ns: int, freq: str) -> pd.DataFrame:
+    df = load_fused(path, mtime_ns)
+    if freq == "1min":
+        return df
+    # plain .mean() hits the vectorized Cython aggregation; the dict-agg
+    # form dispatched column-by-column through the slow generic path
+    return (df
+            .resample(freq)
+            .mean()
+            .dropna(subset=["co2_ppm"]))
+
+
+df = resample_fused(str(file_choice), file_choice.stat().st_mtime_ns, freq)
 
 # Helper counts
 hr_values = df["hr_bpm"].notna().sum()
 total_rows = len(df)
 
+# raw NumPy views used by the score / correlation math below — avoids
+# allocating intermediate Series/DataFrames on every rerun
+co2_arr = df["co2_ppm"].to_numpy()
+hr_arr  = df["hr_bpm"].to_numpy()
+
+# hour-of-day from the int64 ns index — one integer op per row instead
+# of pandas' between_time indexer
+hod = (df.index.values.view("int64") // 3_600_000_000_000) % 24
+
+
+# all day-level statistics in one (jitted) pass, memoized per file/bucket;
+# the arrays ride along underscore-prefixed (excluded from the cache key,
+# which stays (path, mtime, freq)) so the kernel never silently reads
+# globals that drifted from the keyed file
+@st.cache_data(show_spinner=False)
+def day_stats(path: str, mtime_ns: int, freq: str, _hod, _co2, _hr):
+    return _day_stats_kernel(_hod, _co2, _hr)
+
+
+night_co2, night_hr, day_co2_mean, lowhr_co2, pearson_r = day_stats(
+    str(file_choice), file_choice.stat().st_mtime_ns, freq,
+    hod, co2_arr, hr_arr)
+
 # ── SIMPLE NIGHT-SCORE STUB ──────────────────────────────────────────
 try:
-    asleep = df["hr_bpm"] < 65
-    avg_co2_sleep = df.loc[asleep, "co2_ppm"].mean()
-    night_score = max(0, 100 - int(round(avg_co2_sleep - 400) / 3))  # toy
-except Exception:
+    night_score = max(0, 100 - int(round(lowhr_co2 - 400) / 3))  # toy
+except (ValueError, OverflowError):       # NaN when no HR < 65 bpm
     night_score = "—"
 
 # ── LAYOUT ───────────────────────────────────────────────────────────
@@ -100,10 +199,16 @@ st.subheader(
     f"({total_rows:,} rows, {hr_values:,} HR values, bucket={bucket[0]})"
     f"   |   Night-score: **{night_score}**")
 
-# Download
+# Download — bytes cached on (path, mtime) so reruns don't re-read the
+# whole CSV just to offer the button
+@st.cache_data(show_spinner=False)
+def file_bytes(path: str, mtime_ns: int) -> bytes:
+    return Path(path).read_bytes()
+
+
 st.download_button(
     label="⬇️ Download this fused CSV",
-    data=file_choice.read_bytes(),
+    data=file_bytes(str(file_choice), file_choice.stat().st_mtime_ns),
     mime="text/csv",
     file_name=file_choice.name,
 )
@@ -117,12 +222,9 @@ overlay = df[["co2_ppm", "hr_bpm"]].dropna()
 st.line_chart(overlay, use_container_width=True, height=250)
 
 # --- after we load the day’s fused DataFrame ------------------------------
-import numpy as np
-
 # crude example: penalise high CO₂, reward low resting HR
-sleep_blocks = df.between_time("00:00", "08:00")
-mean_co2  = sleep_blocks["co2_ppm"].mean()
-mean_hr   = sleep_blocks["hr_bpm"].mean()
+mean_co2 = night_co2
+mean_hr  = night_hr
 
 score = 100
 score -= (mean_co2 - 600) * 0.05     # −1 pt per 20 ppm above 600
@@ -135,17 +237,13 @@ st.caption(f"(avg CO₂ ≈ {mean_co2:0.0f} ppm, avg HR ≈ {mean_hr:0.0f} bpm)"
 # ──────────────────────────────────────────────────────────────────
 # 4.  QUICK SCORE-CARDS  ───────────────────────────────────────────
 # ------------------------------------------------------------------
-night_block = df.between_time("00:00", "08:00")      # your sleep window
-day_block   = df.between_time("08:00", "23:59")      # the rest
-
-def air_quality_score(block: pd.DataFrame) -> float:
+def air_quality_score(mean_co2: float) -> float:
     """Linear penalty above 600 ppm and a hard floor at 0."""
-    mean_co2 = block["co2_ppm"].mean()
     score = 100 - max(mean_co2 - 600, 0) * 0.05      # −1 pt per 20 ppm
     return max(0, min(100, score)), mean_co2
 
-sleep_score, sleep_co2 = air_quality_score(night_block)
-day_score,   day_co2   = air_quality_score(day_block)
+sleep_score, sleep_co2 = air_quality_score(night_co2)      # your sleep window
+day_score,   day_co2   = air_quality_score(day_co2_mean)   # the rest
 
 with st.container():
     col1, col2 = st.columns(2)
@@ -165,7 +263,7 @@ corr_df = df.dropna(subset=["hr_bpm"])
 if corr_df.empty:
     st.info("No overlapping CO₂ + HR data to correlate.")
 else:
-    r = corr_df["co2_ppm"].corr(corr_df["hr_bpm"])
+    r = pearson_r
     st.caption(f"Pearson *r* = **{r:+.2f}**   ({len(corr_df):,} paired points)")
 
     import altair as alt
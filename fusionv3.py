@@ -17,142 +17,534 @@ Jupyter for air-quality / wellbeing insights.
 HOW
 ===
 1.  Lift csv’s 128 kB field limit (HR rows are huge).
-2.  For each `bio_YYYY-MM-DD.csv` in  `~/biologger/data/raw/`
+2.  For each `bio_YYYY-MM-DD.arrow` (or legacy `.csv`) in  `~/biologger/data/raw/`
        • parse its “data” blob → rows (timestamp, hr_bpm, …)  
-       • cache to `~/biologger/data/flat/hr_YYYY-MM-DD.csv`
+       • cache to `~/biologger/data/flat/hr_YYYY-MM-DD.parquet`
 3.  **Collect all** `co2_YYYY-MM-DDT*.json` in `~/data/co2/`, concat, resample
     to 1-minute means.
 4.  `merge_asof` tables with ±3 min tolerance.
 5.  Write `~/biologger/data/fused/fused_YYYY-MM-DD.csv`.
-6.  Print a quick report + first 50 rows (all) + first 50 rows *with* HR.
+6.  Print a quick report; set BIOLOGGER_PREVIEW=1 for row previews.
 
 --------------------------------------------------------------------------"""
 
-import ast, csv, json, sys, pathlib
+import csv, io, os, sys, pathlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import orjson
 import pandas as pd
 
+from _fastparse import loads_blob
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    from pyarrow import json as pa_json
+except ImportError:                     # Arrow readers/writers are optional
+    pa = pa_csv = pa_json = None
+
+try:
+    from numba import njit, prange      # JIT for the asof kernel — optional
+except ImportError:
+    njit = prange = None
+
 # ── directories ──────────────────────────────────────────────────────
 RAW_DIR   = pathlib.Path("~/biologger/data/raw").expanduser()
 FLAT_DIR  = pathlib.Path("~/biologger/data/flat").expanduser()
 CO2_DIR   = pathlib.Path("~/data/co2").expanduser()
 FUSED_DIR = pathlib.Path("~/biologger/data/fused").expanduser()
-for d in (FLAT_DIR, FUSED_DIR):
+CACHE_DIR = FUSED_DIR / ".cache"       # per-day CO₂ 1-min resample sidecars
+for d in (FLAT_DIR, FUSED_DIR, CACHE_DIR):
     d.mkdir(parents=True, exist_ok=True)
 
 csv.field_size_limit(sys.maxsize)          # allow multi-MB fields
 
-# ── helper: flatten one raw HR CSV ───────────────────────────────────
-def flatten_hr(raw_csv: pathlib.Path) -> pathlib.Path:
-    day = raw_csv.stem.split("_")[-1]               # YYYY-MM-DD
-    flat_csv = FLAT_DIR / f"hr_{day}.csv"
+# ── helper: iterate archived payload dicts from one raw file ─────────
+def iter_raw_payloads(raw_path: pathlib.Path):
+    """Yield one payload dict per archived POST.
 
-    rows = []
-    with raw_csv.open(newline="") as fh:
-        rdr = csv.DictReader(fh)
+    Arrow files (the ingest writes an IPC stream per day, one stream
+    appended per service restart) hold the blob as raw JSON text, so it
+    goes straight through orjson — no repr-dialect repair, no
+    literal_eval. Legacy days are pandas-written CSVs whose "data"
+    column is a Python-repr blob; loads_blob handles those.
+    """
+    if raw_path.suffix == ".arrow":
+        if pa is None:
+            # pyarrow is optional everywhere else in this module, but
+            # there is no fallback parser for the IPC format
+            print(f"▲  {raw_path.name}: pyarrow is required to read .arrow "
+                  "raw archives → skip")
+            return
+        with raw_path.open("rb") as fh:
+            while True:
+                try:
+                    reader = pa.ipc.open_stream(fh)
+                except pa.ArrowInvalid:
+                    return                  # clean EOF between streams
+                try:
+                    for batch in reader:
+                        for blob in batch.column("data").to_pylist():
+                            yield orjson.loads(blob)
+                except pa.ArrowInvalid:
+                    # truncated tail batch — ingest killed mid-flush or
+                    # still buffering. Everything before it parsed fine;
+                    # treat it as EOF like the CSV branch skips bad rows.
+                    return
+        return
+
+    with raw_path.open(newline="") as fh:
+        rdr = csv.reader(fh)            # plain reader: no per-row dict alloc
+        header = next(rdr, None)
+        if header is None:
+            return
+        data_ix = header.index("data")
         for rec in rdr:
             try:
-                payload = ast.literal_eval(rec["data"])
-                for m in payload["data"]["metrics"]:
-                    if m.get("name") != "heart_rate":
-                        continue
-                    for beat in m["data"]:
-                        rows.append(
-                            (beat["date"],
-                             beat.get("Avg", beat.get("value")),
-                             beat.get("source"),
-                             beat.get("context"))
-                        )
+                yield loads_blob(rec[data_ix])
             except Exception:
-                continue  # skip malformed row
+                continue                # skip malformed row
 
-    if rows:
-        pd.DataFrame(rows,
-                     columns=["timestamp", "hr_bpm", "source", "context"]
-                     ).to_csv(flat_csv, index=False)
-    return flat_csv
+# ── helper: flatten one raw HR archive ───────────────────────────────
+def flatten_hr(raw_file: pathlib.Path) -> tuple[pathlib.Path, pd.DataFrame]:
+    """Returns (flat parquet path, HR frame) — the frame goes straight to
+    the merger, so the freshly built table is never re-read from disk."""
+    day = raw_file.stem.split("_")[-1]              # YYYY-MM-DD
+    flat_path = FLAT_DIR / f"hr_{day}.parquet"
 
-# ── helper: load all CO₂ JSONs for a day ─────────────────────────────
-def load_day_co2(day: str) -> pd.DataFrame:
-    records = []
-    for jp in sorted(CO2_DIR.glob(f"co2_{day}T*.json")):
-        with jp.open() as fh:
-            for ln in fh:
-                ln = ln.strip().rstrip(",")
-                if ln in ("", "[", "]"):
+    # historical days: flat file already newer than the raw blob → reuse it
+    # and skip the (expensive) per-row blob re-parse entirely
+    if flat_path.exists() and flat_path.stat().st_mtime >= raw_file.stat().st_mtime:
+        return flat_path, pd.read_parquet(flat_path)
+
+    # struct-of-arrays accumulation: four flat lists instead of a list of
+    # per-beat tuples, handed to the DataFrame as ready-made columns
+    dates, bpms, srcs, ctxs = [], [], [], []
+    add_d, add_b, add_s, add_c = dates.append, bpms.append, srcs.append, ctxs.append
+    for payload in iter_raw_payloads(raw_file):
+        try:
+            for m in payload["data"]["metrics"]:
+                if m.get("name") != "heart_rate":
                     continue
-                try:
-                    records.append(json.loads(ln))
-                except json.JSONDecodeError:
-                    continue  # ignore junk lines
-    if not records:
+                for b in m["data"]:
+                    get = b.get
+                    add_d(b["date"])
+                    add_b(get("Avg", get("value")))
+                    add_s(get("source"))
+                    add_c(get("context"))
+        except Exception:
+            continue  # skip malformed payload
+
+    if not dates:
+        return flat_path, pd.DataFrame()
+
+    flat = pd.DataFrame({
+        "timestamp": dates,
+        "hr_bpm":    pd.Series(bpms, dtype="float32"),  # None → NaN
+        "source":    pd.Categorical(srcs),
+        "context":   pd.Categorical(ctxs),
+    })
+    # Parquet + snappy: binary write, dictionary-encoded source/context
+    flat.to_parquet(flat_path, compression="snappy")
+    return flat_path, flat
+
+# ── helper: parse one CO₂ JSON in a single shot ──────────────────────
+def read_co2_records(jp: pathlib.Path) -> list:
+    """Parse a whole co2_*.json file with one orjson call.
+
+    The logger writes an array with one record per line and a trailing
+    comma after each object; a half-written final record (logger still
+    running) is dropped by truncating at the last complete ``}``.
+    """
+    raw = jp.read_bytes()
+    end = raw.rfind(b"}")
+    if end == -1:
+        return []
+    body = raw[: end + 1].strip().lstrip(b"[").strip()
+    try:
+        return orjson.loads(b"[" + body + b"]")
+    except orjson.JSONDecodeError:
+        pass
+
+    # one corrupt record no longer sinks the whole file: the logger is
+    # line-oriented, so salvage record-by-record. splitlines() on the
+    # already-read bytes costs no extra I/O, and the bound loads skips an
+    # attribute lookup per line.
+    loads, records = orjson.loads, []
+    for ln in body.splitlines():
+        ln = ln.strip().rstrip(b",")
+        if not ln or ln in (b"[", b"]"):
+            continue
+        try:
+            records.append(loads(ln))
+        except orjson.JSONDecodeError:
+            continue
+    return records
+
+# ── helper: one CO₂ JSON file → typed DataFrame ──────────────────────
+if pa is not None:
+    CO2_SCHEMA = pa.schema([
+        ("timestamp",    pa.timestamp("ns")),
+        ("co2_ppm",      pa.float32()),
+        ("temp_c",       pa.float32()),
+        ("humidity_pct", pa.float32()),
+    ])
+
+
+def _co2_frame_orjson(jp: pathlib.Path) -> pd.DataFrame:
+    # column-wise (struct-of-arrays) construction: one float32 array per
+    # sensor column instead of a DataFrame built from Python dicts
+    recs = read_co2_records(jp)
+    if not recs:
         return pd.DataFrame()
+    n, nan = len(recs), float("nan")
+
+    # the logger writes naïve datetime.isoformat() strings → an exact
+    # format engages pandas' C strptime fastpath; any stragglers (offset
+    # suffix, junk lines) re-parse through the flexible ISO8601 path
+    raw_ts = pd.Series([r.get("timestamp") for r in recs])
+    ts = pd.to_datetime(raw_ts, errors="coerce",
+                        format="%Y-%m-%dT%H:%M:%S.%f")
+    bad = ts.isna() & raw_ts.notna()
+    if bad.any():
+        ts.loc[bad] = pd.to_datetime(
+            raw_ts[bad],
+            errors="coerce",      # don’t explode on weird lines
+            utc=True,             # attach UTC if offset supplied
+            format="ISO8601"      # pandas ≥1.4: mixed ISO support
+        ).dt.tz_convert(None)     # strip timezone → naïve dtype
+
+    return pd.DataFrame({
+        "timestamp": ts,
+        "co2_ppm": np.fromiter(
+            (r.get("co2_ppm", nan) for r in recs), dtype=np.float32, count=n),
+        "temp_c": np.fromiter(
+            (r.get("temp_c", nan) for r in recs), dtype=np.float32, count=n),
+        "humidity_pct": np.fromiter(
+            (r.get("humidity_pct", nan) for r in recs), dtype=np.float32, count=n),
+    })
+
+
+def read_co2_frame(jp: pathlib.Path) -> pd.DataFrame:
+    """Parse one co2_*.json straight into typed columns.
+
+    Preferred path: Arrow's multithreaded JSON reader with an explicit
+    schema, so timestamps and float32 sensor columns materialize in C
+    with no Python dicts in between. Files it can't digest (offsetted
+    timestamps, junk) drop back to the orjson column-wise path.
+    """
+    if pa_json is None:
+        return _co2_frame_orjson(jp)
+    raw = jp.read_bytes()
+    end = raw.rfind(b"}")
+    if end == -1:
+        return pd.DataFrame()
+    # NDJSON-ify: drop the array brackets and each record's trailing comma
+    # (records are flat, so "}," only ever ends a record)
+    body = raw[: end + 1].lstrip(b"[ \r\n").replace(b"},", b"}")
+    try:
+        return pa_json.read_json(
+            io.BytesIO(body),
+            parse_options=pa_json.ParseOptions(explicit_schema=CO2_SCHEMA),
+        ).to_pandas()
+    except pa.ArrowInvalid:
+        return _co2_frame_orjson(jp)
+
+
+# ── helper: load all CO₂ JSONs for a day ─────────────────────────────
+def load_day_co2(day: str, min_mtime_ns: int = 0) -> pd.DataFrame:
+    co2_files = sorted(CO2_DIR.glob(f"co2_{day}T*.json"))
+    newest = max((f.stat().st_mtime_ns for f in co2_files), default=0)
+
+    # sidecar cache of the day's 1-minute means, keyed by the newest source
+    # mtime in the filename: a re-run where only the HR side changed skips
+    # the whole parse+resample pipeline (full-day loads only — incremental
+    # calls parse a partial file set and must not populate the cache)
+    cached = CACHE_DIR / f"co2_{day}.{newest}.1m.parquet"
+    if min_mtime_ns == 0 and cached.exists():
+        return pd.read_parquet(cached)
+
+    frames = []
+    for jp in co2_files:
+        if jp.stat().st_mtime_ns <= min_mtime_ns:
+            continue                       # already folded into the fused file
+        df = read_co2_frame(jp)
+        if len(df):
+            frames.append(df)
+    if not frames:
+        return pd.DataFrame()
+
+    cat = pd.concat(frames, ignore_index=True).dropna(subset=["timestamp"])
+
+    # sparse minute means: resample("60s") materializes a dense index over
+    # the day's whole span and then .dropna() throws the gap rows away —
+    # grouping on integer minute buckets only ever allocates the non-empty
+    # minutes
+    buckets = cat["timestamp"].to_numpy().view("i8") // 60_000_000_000
+    day_co2 = cat.drop(columns="timestamp").groupby(buckets, sort=True).mean()
+    day_co2.index = pd.to_datetime(day_co2.index * 60_000_000_000)
+    day_co2 = day_co2.rename_axis("timestamp").reset_index()
+
+    if min_mtime_ns == 0 and len(day_co2):
+        tmp = cached.with_suffix(".tmp")
+        day_co2.to_parquet(tmp, compression="snappy")
+        os.replace(tmp, cached)            # atomic publish
+        for stale in CACHE_DIR.glob(f"co2_{day}.*.1m.parquet"):
+            if stale != cached:
+                stale.unlink(missing_ok=True)
+    return day_co2
+# ── helper: nearest-asof join via searchsorted ───────────────────────
+TOL_NS = 180_000_000_000           # ±3 min tolerance, in nanoseconds
+
+
+def _asof_pick(a, b, tol_ns):
+    """(pick indices into b, within-tolerance mask) for each element of a."""
+    idx   = np.searchsorted(b, a)
+    left  = np.clip(idx - 1, 0, b.size - 1)
+    right = np.clip(idx,     0, b.size - 1)
+    dl = np.abs(a - b[left])
+    dr = np.abs(a - b[right])
+    pick = np.where(dl <= dr, left, right)
+    return pick, np.minimum(dl, dr) <= tol_ns
+
 
-    return (
-        pd.DataFrame.from_records(records)
-          .assign(
-              # parse both offsetted & naïve ISO strings; coerce bad ones to NaT
-              timestamp=lambda df:
-                  pd.to_datetime(
-                      df["timestamp"],
-                      errors="coerce",          # don’t explode on weird lines
-                      utc=True,                 # attach UTC if offset supplied
-                      format="ISO8601"          # pandas ≥1.4: mixed ISO support
-                  ).dt.tz_convert(None)         # strip timezone → naïve dtype
-          )
-          .dropna(subset=["timestamp"])
-          .set_index("timestamp")
-          .resample("60s").mean()
-          .dropna()
-          .reset_index()
-    )
-# ── main loop ────────────────────────────────────────────────────────
-for raw_csv in sorted(RAW_DIR.glob("bio_*.csv"), key=lambda p: p.stat().st_mtime):
-    day = raw_csv.stem.split("_")[-1]                # YYYY-MM-DD
-    flat_csv = flatten_hr(raw_csv)
-
-    if not flat_csv.exists():
-        print(f"{raw_csv.name}: no HR rows → skip\n")
-        continue
-
-    hr = (pd.read_csv(flat_csv)
+if njit is not None:
+    # same kernel, fused: one parallel pass with no clip/abs/minimum
+    # temporaries. cache=True writes the compiled artifact to disk so the
+    # ~1 s compile is paid once, not per run.
+    @njit(cache=True, parallel=True)
+    def _asof_pick(a, b, tol_ns):               # noqa: F811
+        n = a.size
+        pick    = np.empty(n, np.int64)
+        matched = np.empty(n, np.bool_)
+        for i in prange(n):
+            idx = np.searchsorted(b, a[i])
+            lo = idx - 1 if idx > 0 else 0
+            hi = idx if idx < b.size else b.size - 1
+            dl = a[i] - b[lo]
+            if dl < 0:
+                dl = -dl
+            dr = b[hi] - a[i]
+            if dr < 0:
+                dr = -dr
+            if dl <= dr:
+                pick[i], matched[i] = lo, dl <= tol_ns
+            else:
+                pick[i], matched[i] = hi, dr <= tol_ns
+        return pick, matched
+
+
+def asof_nearest(co2: pd.DataFrame, hr: pd.DataFrame) -> pd.DataFrame:
+    """Hand-rolled merge_asof(direction="nearest", tolerance=3min).
+
+    Both sides are sorted 1-D timestamps, so one np.searchsorted over the
+    HR column plus a pick-the-closer-neighbour gather replaces pandas'
+    entire merge machinery (dtype validation, by-group handling, …).
+    """
+    a = co2["timestamp"].to_numpy().view("i8")
+    b = hr["timestamp"].to_numpy().view("i8")
+
+    pick, matched = _asof_pick(a, b, TOL_NS)
+
+    merged = co2.copy()
+    for col in ("hr_bpm", "source", "context"):
+        vals = hr[col].to_numpy()[pick]          # gather (fancy index copies)
+        if vals.dtype.kind == "f":
+            vals[~matched] = np.nan
+        elif vals.dtype.kind in "iu":
+            vals[~matched] = -1                  # categorical "no match" code
+        else:
+            vals = vals.astype(object)
+            vals[~matched] = None
+        merged[col] = vals
+    return merged
+
+# ── helper: write one fused CSV ──────────────────────────────────────
+def write_fused_csv(merged: pd.DataFrame, out: pathlib.Path) -> None:
+    """Arrow's multithreaded C writer instead of pandas' per-cell Python
+    formatting; pandas stays as the no-pyarrow fallback."""
+    if pa_csv is None:
+        merged.to_csv(out, index=False)
+        return
+    tbl = pa.Table.from_pandas(merged, preserve_index=False)
+    for i, f in enumerate(tbl.schema):
+        if pa.types.is_dictionary(f.type):      # CSV writer wants plain strings
+            tbl = tbl.set_column(i, f.name, tbl.column(i).cast(f.type.value_type))
+    pa_csv.write_csv(tbl, out)
+
+# ── phase 1: gather one day's inputs (runs in a worker process) ──────
+def gather_one_day(raw_file: pathlib.Path):
+    """Flatten/parse a single day. Returns (message, payload).
+
+    message is a progress/skip line for the parent to print in order;
+    payload is (day, co2, hr, state) when the day needs (re)merging.
+    """
+    day = raw_file.stem.split("_")[-1]                # YYYY-MM-DD
+
+    # ── incremental bookkeeping ──────────────────────────────────────
+    # fused_<day>.meta.json remembers the input mtimes of the last merge:
+    # unchanged inputs → skip the day; new CO₂ JSONs only → parse just
+    # those and fold them into the existing fused frame
+    co2_files = sorted(CO2_DIR.glob(f"co2_{day}T*.json"))
+    co2_mtime = max((f.stat().st_mtime_ns for f in co2_files), default=0)
+    hr_mtime  = raw_file.stat().st_mtime_ns
+    out       = FUSED_DIR / f"fused_{day}.csv"
+    pq_out    = out.with_suffix(".parquet")
+    meta_path = FUSED_DIR / f"fused_{day}.meta.json"
+
+    since = 0                      # parse every CO₂ JSON by default
+    prev_fused = None
+    if meta_path.exists() and pq_out.exists():
+        meta = orjson.loads(meta_path.read_bytes())
+        if meta.get("last_hr_mtime_ns", -1) >= hr_mtime:
+            if meta.get("last_co2_mtime_ns", -1) >= co2_mtime:
+                return f"•  {day}: inputs unchanged → skip", None
+            since = meta["last_co2_mtime_ns"]
+            prev_fused = pd.read_parquet(pq_out)
+
+    flat_path, hr_flat = flatten_hr(raw_file)
+
+    if hr_flat.empty:
+        return f"{raw_file.name}: no HR rows → skip\n", None
+
+    # Health beats all share one fixed format → exact strptime fastpath
+    hr = (hr_flat
             .assign(timestamp=lambda df:
-                    pd.to_datetime(df["timestamp"], utc=True)
-                      .dt.tz_convert(None))
-            .dropna(subset=["hr_bpm"]))
+                    pd.to_datetime(df["timestamp"], utc=True,
+                                   format="%Y-%m-%d %H:%M:%S %z",
+                                   errors="coerce", cache=True))
+            .dropna(subset=["timestamp", "hr_bpm"]))
 
     if hr.empty:
-        print(f"{raw_csv.name}: no HR rows → skip\n")
-        continue
+        return f"{raw_file.name}: no HR rows → skip\n", None
 
-    co2 = load_day_co2(day)
+    # epoch ns straight off the tz-aware parse: .dt.tz_convert(None) would
+    # allocate a fresh DatetimeIndex only to restate the same int64 values.
+    # Timestamps stay i8 through the concat/sort/merge and become datetimes
+    # again once, in the parent, just before the per-day writes.
+    hr["timestamp"] = hr["timestamp"].astype("int64")
+
+    co2 = load_day_co2(day, since)
     if co2.empty:
-        print(f"▲  no CO₂ logs for {day} → skip\n")
-        continue
-
-    merged = pd.merge_asof(
-        co2.sort_values("timestamp"),
-        hr.sort_values("timestamp"),
-        on="timestamp",
-        direction="nearest",
-        tolerance=pd.Timedelta("3min")
-    )
-
-    out = FUSED_DIR / f"fused_{day}.csv"
-    merged.to_csv(out, index=False)
-
-    # ── report ───────────────────────────────────────────────────────
-    print(f"\n✅  Wrote {out}")
-    print(f"   CO₂ minutes: {len(co2):>6,}")
-    print(f"   HR  samples : {len(hr):>6,}")
-    print(f"   Fused rows : {len(merged):>6,}")
-    print(f"   HR matches : {merged['hr_bpm'].notna().sum():>6,}\n")
-
-    pd.set_option("display.width", 120)
-    print("── First 50 rows ──")
-    print(merged.tail(100).to_string(index=False))
-
-    with_hr = merged[merged["hr_bpm"].notna()].tail(100)
-    if not with_hr.empty:
-        print("\n── Last 100 rows *with HR* ──")
-        print(with_hr.to_string(index=False))
-    print("\n" + "═"*80 + "\n")
+        return f"▲  no CO₂ logs for {day} → skip\n", None
+    co2["timestamp"] = co2["timestamp"].astype("int64")
+
+    state = {
+        "prev_fused": prev_fused,
+        "out": out, "pq_out": pq_out, "meta_path": meta_path,
+        "co2_mtime": co2_mtime, "hr_mtime": hr_mtime,
+        "n_co2": len(co2), "n_hr": len(hr),
+    }
+    return None, (day, co2, hr, state)
+
+
+def main():
+    # ── phase 1: days are independent parse pipelines → bag-of-days
+    # parallelism; the merge and writes stay in the parent. chunksize
+    # batches several days per worker to amortise the pandas import.
+    co2_parts, hr_parts = [], []
+    day_state = {}      # day → bookkeeping for the write/report phase
+
+    # one raw archive per day; .arrow (current ingest) wins over a legacy
+    # .csv for the same day. Name order == date order.
+    by_day = {p.stem.split("_")[-1]: p for p in sorted(RAW_DIR.glob("bio_*.csv"))}
+    by_day.update({p.stem.split("_")[-1]: p
+                   for p in sorted(RAW_DIR.glob("bio_*.arrow"))})
+    raw_files = [by_day[d] for d in sorted(by_day)]
+    if raw_files:
+        with ProcessPoolExecutor() as ex:
+            for msg, payload in ex.map(gather_one_day, raw_files, chunksize=4):
+                if msg:
+                    print(msg)
+                if payload:
+                    day, co2, hr, state = payload
+                    # tag each CO₂ row with its source day: a record just
+                    # past midnight belongs to the file (and fused CSV) it
+                    # came from, not to the calendar date it lands on
+                    co2_parts.append(co2.assign(day=day))
+                    hr_parts.append(hr)
+                    day_state[day] = state
+
+    if not day_state:
+        return
+
+    # ── phase 2: one asof join over every day at once ────────────────
+    # a single sorted join amortises pandas' setup cost across days; a
+    # CO₂ minute right at midnight may now match an HR beat from the
+    # adjacent day, which the ±3 min tolerance makes harmless
+    all_co2 = pd.concat(co2_parts, ignore_index=True)
+    all_hr  = pd.concat(hr_parts,  ignore_index=True)
+    if not all_co2["timestamp"].is_monotonic_increasing:
+        all_co2 = all_co2.sort_values("timestamp", ignore_index=True)
+    if not all_hr["timestamp"].is_monotonic_increasing:
+        all_hr = all_hr.sort_values("timestamp", ignore_index=True)
+
+    # factorize the object payload: 2-byte category codes ride through the
+    # join instead of PyObject pointers (no refcount traffic in the gather)
+    hr_cats = {}
+    for col in ("source", "context"):
+        cat = all_hr[col].astype("category")
+        hr_cats[col] = cat.cat.categories
+        all_hr[col] = cat.cat.codes.astype("int16")      # missing → -1
+
+    merged_all = asof_nearest(all_co2, all_hr)
+
+    for col in ("source", "context"):
+        merged_all[col] = pd.Categorical.from_codes(
+            merged_all[col], categories=hr_cats[col])    # -1 → NaN
+
+    # one datetime materialization for the whole run, now that every
+    # integer op (sorts, searchsorted, tolerance) is behind us
+    merged_all["timestamp"] = pd.to_datetime(merged_all["timestamp"], unit="ns")
+
+    # ── phase 3: split per day, write, report ────────────────────────
+    # split on the carried source-day tag, not the timestamp's calendar
+    # date — every row from a day's files ends up in that day's fused CSV
+    for day, merged in merged_all.groupby("day", sort=True):
+        state = day_state[day]
+
+        merged = merged.drop(columns="day").reset_index(drop=True)
+        if state["prev_fused"] is not None:
+            # incremental run: the partially-rewritten tail minutes dedupe
+            # in favour of the freshly merged values
+            merged = (pd.concat([state["prev_fused"], merged])
+                        .drop_duplicates("timestamp", keep="last")
+                        .sort_values("timestamp", ignore_index=True))
+
+        out = state["out"]
+        write_fused_csv(merged, out)
+
+        # Parquet twin (snappy) → dashboards read just the columns they
+        # chart; the CSV stays around for the download button
+        merged.astype({"co2_ppm": "float32", "temp_c": "float32",
+                       "humidity_pct": "float32", "hr_bpm": "float32"}
+                      ).to_parquet(state["pq_out"], compression="snappy")
+
+        state["meta_path"].write_bytes(orjson.dumps(
+            {"last_co2_mtime_ns": state["co2_mtime"],
+             "last_hr_mtime_ns":  state["hr_mtime"]}))
+
+        # ── report ───────────────────────────────────────────────────
+        print(f"\n✅  Wrote {out}")
+        print(f"   CO₂ minutes: {state['n_co2']:>6,}")
+        print(f"   HR  samples : {state['n_hr']:>6,}")
+        print(f"   Fused rows : {len(merged):>6,}")
+        print(f"   HR matches : {merged['hr_bpm'].notna().sum():>6,}\n")
+
+        # to_string formats every cell through Python __format__ — pure
+        # waste under cron, so the previews are opt-in for interactive runs:
+        #   BIOLOGGER_PREVIEW=1 python fusionv3.py
+        if os.environ.get("BIOLOGGER_PREVIEW"):
+            pd.set_option("display.width", 120)
+            print("── Last 100 rows ──")
+            print(merged.tail(100).to_string(index=False))
+
+            with_hr = merged[merged["hr_bpm"].notna()].tail(100)
+            if not with_hr.empty:
+                print("\n── Last 100 rows *with HR* ──")
+                print(with_hr.to_string(index=False))
+        print("\n" + "═"*80 + "\n")
+
+
+if __name__ == "__main__":
+    main()
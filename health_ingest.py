@@ -1,27 +1,106 @@
 #!/usr/bin/env python3
 # health_ingest.py
+import asyncio
+import os
+import threading
+
 from fastapi import FastAPI, Request
-import pandas as pd, pathlib, datetime as dt, json
+import orjson
+import pandas as pd, pathlib, datetime as dt
+import pyarrow as pa
+import pyarrow.parquet as pq
 from zoneinfo import ZoneInfo           # ← NEW: local-time helper
 
 DATA = pathlib.Path("data"); DATA.mkdir(exist_ok=True)
 app = FastAPI()
 
-@app.post("/health")
-async def sink(req: Request):
-    payload = await req.json()
+# ── raw archive: append-only Arrow IPC stream, one per day ───────────
+# a single open stream + one RecordBatch per POST replaces re-opening a
+# CSV and str()-formatting the whole payload on every request; the blob
+# is stored as raw JSON text, so no literal_eval on the way back out.
+# Restarts append a fresh stream to the same file — readers iterate
+# streams until EOF.
+RAW_SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("ns", tz="UTC")),
+    ("data",      pa.string()),
+])
+raw_writers: dict = {}                  # date → (stream writer, file object)
+FSYNC_EVERY = 25                        # POSTs between fsyncs of the archive
+_since_fsync = 0
+
+
+def raw_writer(day):
+    pair = raw_writers.get(day)
+    if pair is None:
+        raw_dir = DATA / "raw"; raw_dir.mkdir(exist_ok=True)
+        sink = (raw_dir / f"bio_{day}.arrow").open("ab")
+        pair = (pa.ipc.new_stream(sink, RAW_SCHEMA), sink)
+        raw_writers[day] = pair
+    return pair
+
+# ── flat HR sink: one ParquetWriter per day and run ──────────────────
+# appending a typed RecordBatch per POST replaces re-opening and
+# re-formatting a CSV on every request; the footer lands on shutdown.
+# Each service run writes its own part file (systemd restarts us all the
+# time) — truncating hr_<day>.parquet on restart would wipe the rows the
+# previous run already flattened, and an unclean exit only forfeits the
+# current part, not the day.
+FLAT_SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("ns", tz="UTC")),
+    ("hr_bpm",    pa.float32()),
+    ("source",    pa.dictionary(pa.int32(), pa.string())),
+    ("context",   pa.dictionary(pa.int32(), pa.string())),
+])
+flat_writers: dict = {}                 # date → pq.ParquetWriter
+RUN_TS = dt.datetime.now().strftime("%H%M%S")   # part-file suffix per run
+
+
+def flat_writer(day) -> pq.ParquetWriter:
+    w = flat_writers.get(day)
+    if w is None:
+        flat_dir = DATA / "flat"; flat_dir.mkdir(exist_ok=True)
+        w = pq.ParquetWriter(flat_dir / f"hr_{day}.{RUN_TS}.parquet",
+                             FLAT_SCHEMA, compression="snappy")
+        flat_writers[day] = w
+    return w
 
-    # use local (SF) time so filenames roll at local midnight
-    ts = pd.Timestamp.now(tz=ZoneInfo("America/Los_Angeles"))
 
-    raw_dir  = DATA / "raw";  raw_dir.mkdir(exist_ok=True)
-    flat_dir = DATA / "flat"; flat_dir.mkdir(exist_ok=True)
+@app.on_event("shutdown")
+def close_writers():
+    for w, sink in raw_writers.values():
+        w.close()
+        os.fsync(sink.fileno())
+        sink.close()
+    for w in flat_writers.values():
+        w.close()
 
+# to_thread means concurrent POSTs reach _persist on different threadpool
+# threads; the writer dicts and the Arrow writers themselves aren't
+# thread-safe, so persistence is serialized — the event loop stays free,
+# which is the part that matters
+_persist_lock = threading.Lock()
+
+
+def _persist(payload, ts) -> int:
+    """Archive + flatten one payload; runs on a worker thread so disk
+    latency never stalls the event loop."""
     # ---- 1. archive full blob ----
-    raw_fn = raw_dir / f"bio_{ts.date()}.csv"
-    pd.DataFrame([{"data": payload, "time": ts}]).to_csv(
-        raw_fn, mode="a", header=not raw_fn.exists(), index=False
+    batch = pa.RecordBatch.from_pydict(
+        {"timestamp": [ts], "data": [orjson.dumps(payload).decode()]},
+        schema=RAW_SCHEMA,
     )
+    global _since_fsync
+    with _persist_lock:
+        w, sink = raw_writer(ts.date())
+        w.write_batch(batch)
+        # the phone never re-sends an acknowledged POST: hand every batch
+        # to the OS right away, and fsync every FSYNC_EVERY uploads so a
+        # power cut costs at most that many
+        sink.flush()
+        _since_fsync += 1
+        if _since_fsync >= FSYNC_EVERY:
+            os.fsync(sink.fileno())
+            _since_fsync = 0
 
     # ---- 2. flatten any heart-rate objects ----
     rows = []
@@ -38,9 +117,21 @@ async def sink(req: Request):
                 }
             )
     if rows:
-        flat_fn = flat_dir / f"hr_{ts.date()}.csv"
-        pd.DataFrame(rows).to_csv(
-            flat_fn, mode="a", header=not flat_fn.exists(), index=False
-        )
+        batch = pa.RecordBatch.from_pylist(rows, schema=FLAT_SCHEMA)
+        with _persist_lock:
+            flat_writer(ts.date()).write_batch(batch)
+
+    return len(rows)
+
+
+@app.post("/health")
+async def sink(req: Request):
+    payload = await req.json()
+
+    # use local (SF) time so filenames roll at local midnight
+    ts = pd.Timestamp.now(tz=ZoneInfo("America/Los_Angeles"))
 
-    return {"status": "ok", "rows_written": len(rows)}
+    # the writes are synchronous — push them off the event-loop thread so
+    # concurrent phone uploads don't serialize on disk latency
+    n = await asyncio.to_thread(_persist, payload, ts)
+    return {"status": "ok", "rows_written": n}
@@ -13,6 +13,7 @@ The file list is cached for 60 s so new days appear automatically.
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import pathlib
@@ -25,16 +26,59 @@ st.title("Indoor CO₂ & Heart-Rate dashboard")
 st.caption("Charts refresh automatically every 60 s")
 
 # ── helper caches ──────────────────────────────────────────────────
-@st.cache_data(ttl=60)
-def list_fused_files():
+# keyed on the directory mtime: one stat syscall per rerun replaces the
+# full glob until a fused file is actually added or removed
+@st.cache_data(show_spinner=False)
+def list_fused_files(dir_mtime_ns: int):
     return sorted(FUSED_DIR.glob("fused_*.csv"))
 
 @st.cache_data(ttl=60)
 def load_csv(path):
-    return pd.read_csv(path, parse_dates=["timestamp"])
+    # Parquet twin (written by fusionv3) lets us read only charted columns;
+    # fall back to the multithreaded pyarrow CSV parser for old days
+    pq = path.with_suffix(".parquet")
+    if pq.exists():
+        return pd.read_parquet(pq, columns=["timestamp", "co2_ppm", "hr_bpm"])
+    return pd.read_csv(path, parse_dates=["timestamp"], engine="pyarrow",
+                       dtype={"co2_ppm": "float32", "hr_bpm": "float32"})
+
+# ── helper: LTTB downsample ────────────────────────────────────────
+MAX_POINTS = 1500          # ≈ pixels across a wide chart; more is invisible
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int = MAX_POINTS):
+    """Largest-Triangle-Three-Buckets downsample (Steinarsson 2013).
+
+    Keeps the first/last points and, per bucket, the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average — visually lossless at ≤ chart-width resolution.
+    """
+    n = x.size
+    if n <= n_out:
+        return x, y
+
+    xi = (x.view("i8") if x.dtype.kind == "M" else x).astype("float64")
+    yi = y.astype("float64")
+    edges = np.linspace(1, n - 1, n_out - 1).astype("int64")
+
+    idx = np.empty(n_out, dtype="int64")
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if hi <= lo:                       # degenerate (tiny) bucket
+            idx[i + 1] = a = lo
+            continue
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i < n_out - 3 else (edges[i + 1], n)
+        avg_x, avg_y = xi[nlo:nhi].mean(), yi[nlo:nhi].mean()
+        area = np.abs((xi[a] - avg_x) * (yi[lo:hi] - yi[a])
+                      - (xi[a] - xi[lo:hi]) * (avg_y - yi[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return x[idx], y[idx]
 
 # ── sidebar day-picker ─────────────────────────────────────────────
-files = list_fused_files()
+files = list_fused_files(FUSED_DIR.stat().st_mtime_ns) if FUSED_DIR.exists() else []
 if not files:
     st.error("No fused CSVs found in ~/biologger/data/fused/")
     st.stop()
@@ -49,50 +93,56 @@ st.subheader(f"Showing: **{csv_path.name}**  "
              f"({len(df):,} rows, {df['hr_bpm'].notna().sum():,} HR values)")
 
 # ── build charts ───────────────────────────────────────────────────
-fig_co2 = go.Figure().add_scatter(
-    x=df["timestamp"], y=df["co2_ppm"],
-    mode="lines", name="CO₂ ppm", line=dict(color="#1f77b4")
-)
-fig_co2.update_layout(
-    title="CO₂ concentration", yaxis_title="ppm", xaxis_title="time",
-    margin=dict(l=40, r=20, t=40, b=40), height=300
-)
-
-fig_hr = go.Figure().add_scatter(
-    x=df["timestamp"], y=df["hr_bpm"],
-    mode="lines", name="HR bpm", line=dict(color="#d62728")
-)
-fig_hr.update_layout(
-    title="Heart-rate", yaxis_title="bpm", xaxis_title="time",
-    margin=dict(l=40, r=20, t=40, b=40), height=300
-)
-
-fig_overlay = go.Figure()
-fig_overlay.add_scatter(
-    x=df["timestamp"], y=df["co2_ppm"],
-    mode="lines", name="CO₂ ppm", line=dict(color="#1f77b4")
-)
-if df["hr_bpm"].notna().sum():
-    fig_overlay.add_scatter(
-        x=df["timestamp"], y=df["hr_bpm"],
-        mode="lines", name="HR bpm", yaxis="y2", line=dict(color="#d62728")
+# the single-metric charts are plain Vega-Lite line charts now — far
+# less figure/layout JSON per rerun than a full Plotly figure; Plotly
+# survives only for the dual-axis overlay, rebuilt once per file version
+@st.cache_data(show_spinner=False)
+def build_charts(path, mtime_ns: int):
+    df = load_csv(path)
+    ts_arr  = df["timestamp"].to_numpy()
+    co2_arr = df["co2_ppm"].to_numpy(dtype="float32")
+    hr_arr  = df["hr_bpm"].to_numpy(dtype="float32")
+
+    # downsample long series before they ever reach the browser
+    hr_ok = ~np.isnan(hr_arr)
+    ts_co2, co2_ds = lttb(ts_arr, co2_arr)
+    ts_hr,  hr_ds  = lttb(ts_arr[hr_ok], hr_arr[hr_ok])
+
+    co2_line = pd.Series(co2_ds, index=pd.DatetimeIndex(ts_co2), name="CO₂ ppm")
+    hr_line  = pd.Series(hr_ds,  index=pd.DatetimeIndex(ts_hr),  name="HR bpm")
+
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        x=ts_co2, y=co2_ds,
+        mode="lines", name="CO₂ ppm", line=dict(color="#1f77b4")
+    ))
+    if hr_ok.any():
+        fig.add_trace(go.Scattergl(
+            x=ts_hr, y=hr_ds,
+            mode="lines", name="HR bpm", yaxis="y2", line=dict(color="#d62728")
+        ))
+    fig.update_layout(
+        title="CO₂ and HR overlay",
+        xaxis=dict(title="time"),
+        yaxis=dict(title="CO₂ (ppm)"),
+        yaxis2=dict(title="HR (bpm)", overlaying="y", side="right", showgrid=False),
+        legend=dict(orientation="h", y=-0.25),
+        margin=dict(l=60, r=60, t=40, b=60),
+        height=400
     )
+    return co2_line, hr_line, fig
+
 
-fig_overlay.update_layout(
-    title="CO₂ and HR overlay",
-    xaxis=dict(title="time"),
-    yaxis=dict(title="CO₂ (ppm)"),
-    yaxis2=dict(title="HR (bpm)", overlaying="y", side="right", showgrid=False),
-    legend=dict(orientation="h", y=-0.25),
-    margin=dict(l=60, r=60, t=40, b=60),
-    height=400
-)
+co2_line, hr_line, fig_overlay = build_charts(csv_path,
+                                              csv_path.stat().st_mtime_ns)
 
 # ── show charts ────────────────────────────────────────────────────
 col1, col2 = st.columns(2)
 with col1:
-    st.plotly_chart(fig_co2, use_container_width=True)
+    st.caption("CO₂ concentration (ppm)")
+    st.line_chart(co2_line, height=300)
 with col2:
-    st.plotly_chart(fig_hr, use_container_width=True)
+    st.caption("Heart-rate (bpm)")
+    st.line_chart(hr_line, height=300)
 
 st.plotly_chart(fig_overlay, use_container_width=True)
@@ -13,8 +13,15 @@ Columns:   timestamp,co2_ppm,temp_c,humidity_pct,hr_bpm
 """
 
 import json, re, ast, pathlib, datetime as dt
+import numpy as np
+import orjson
 import pandas as pd
 
+try:
+    import ijson                       # streaming parser — optional
+except ImportError:
+    ijson = None
+
 # ── paths ────────────────────────────────────────────────────────────────
 CO2_DIR  = pathlib.Path("~/data/co2").expanduser()
 RAW_DIR  = pathlib.Path("~/biologger/data/raw").expanduser()
@@ -34,17 +41,34 @@ def safe_load(raw: str) -> dict:
     return json.loads(raw)
 
 # ── 1) load ALL CO₂ JSONs for today ──────────────────────────────────────
+def read_co2_records(path: pathlib.Path) -> list:
+    """Stream the JSON array with ijson when available (memory stays
+    bounded however big the live file grows, and the layout no longer
+    has to be one-record-per-line); otherwise one whole-file orjson
+    parse, truncated at the last complete record."""
+    if ijson is not None:
+        records = []
+        with path.open("rb") as f:
+            try:
+                for rec in ijson.items(f, "item", use_float=True):
+                    records.append(rec)
+            except ijson.JSONError:
+                pass        # trailing comma / half-written tail → keep parsed
+        return records
+
+    raw = path.read_bytes()
+    end = raw.rfind(b"}")
+    if end == -1:
+        return []
+    body = raw[: end + 1].strip().lstrip(b"[").strip()
+    try:
+        return orjson.loads(b"[" + body + b"]")
+    except orjson.JSONDecodeError:
+        return []
+
 records = []
 for p in sorted(CO2_DIR.glob(f"co2_{today}*.json")):
-    with p.open() as f:
-        for line in f:
-            line = line.strip().rstrip(",")
-            if line in ("[", "]", ""):
-                continue
-            try:
-                records.append(json.loads(line))
-            except json.JSONDecodeError:
-                pass
+    records.extend(read_co2_records(p))
 
 if not records:
     print(f"⚠ No CO₂ records for {today}")
@@ -55,6 +79,11 @@ co2["timestamp"] = (
     pd.to_datetime(co2["timestamp"], format="ISO8601", utc=True, errors="coerce")
       .dt.tz_convert(None)
 )
+# sensor precision is nowhere near float64 — halve the bytes moved through
+# the resample and the merge
+co2 = co2.astype({c: "float32"
+                  for c in ("co2_ppm", "temp_c", "humidity_pct")
+                  if c in co2.columns})
 co2_1m = (
     co2.set_index("timestamp")
        .resample("60s").mean()
@@ -91,14 +120,24 @@ if not beat_rows:
 
 hr = pd.DataFrame(beat_rows).dropna().sort_values("timestamp")
 
-# ── 3) merge with ±10 minutes tolerance (closest) ───────────────────────
-merged = pd.merge_asof(
-    co2_1m.sort_values("timestamp"),
-    hr.sort_values("timestamp"),
-    on="timestamp",
-    direction="nearest",
-    tolerance=pd.Timedelta("600s"),   # 10 minutes
-)
+# ── 3) nearest match within ±10 minutes, via searchsorted ───────────────
+# both sides are sorted single-key timestamps, so one binary search plus a
+# pick-the-closer-neighbour gather replaces pandas' merge machinery
+a = co2_1m["timestamp"].to_numpy().view("i8")     # resample output is sorted
+b = hr["timestamp"].to_numpy().view("i8")         # sorted when built above
+
+idx   = np.searchsorted(b, a)
+left  = np.clip(idx - 1, 0, b.size - 1)
+right = np.clip(idx,     0, b.size - 1)
+dl = np.abs(a - b[left])
+dr = np.abs(a - b[right])
+pick = np.where(dl <= dr, left, right)
+
+bpm = hr["hr_bpm"].to_numpy(dtype="float32")[pick]
+bpm[np.minimum(dl, dr) > 600_000_000_000] = np.nan   # 10 min, in ns
+
+merged = co2_1m.copy()
+merged["hr_bpm"] = bpm
 
 # ── 4) write fused CSV ──────────────────────────────────────────────────
 out = OUT_DIR / f"fused_{today}.csv"